@@ -212,7 +212,7 @@
 #                 new_observations = Y_raw[-num_new_observations:]
 
 #                 # give new suggestions from initialized values in TurBO
-#                 if len(self.turbo_optimizer.init_configs) > 0:
+#                 if len(self.turbo_optimizer.init_vectors) > 0:
 #                     self.turbo_optimizer.add_new_observations(X[-num_new_observations:],
 #                       Y_raw[-num_new_observations:])
 #                     return self.turbo_optimizer.generate_challengers()
@@ -94,7 +94,7 @@
 #         num_new_bservations = 1  # here we only consider batch size = 1
 
 #         new_observations = Y[-num_new_bservations:]
-#         if len(self.turbo.init_configs) > 0:
+#         if len(self.turbo.init_vectors) > 0:
 #             self.turbo.add_new_observations(X[-num_new_bservations:], Y[-num_new_bservations:])
 #             return self.turbo.generate_challengers()
 #         self.turbo.adjust_length(new_observations)
@@ -377,9 +377,12 @@
 
 #         self.incumbent_array = incumbent_array
 
-#         self.model_x = np.empty([0, len(activate_dims)])
+#         # The observations used to train the model are stored in buffers whose capacity is doubled once they are
+#         # full, model_x and model_y are views of the filled rows
+#         self._model_x_buffer = np.empty([64, len(activate_dims)])
+#         self._model_y_buffer = np.empty([64, 1])
+#         self._n_model_data = 0
 #         self.ss_x = np.empty([0, len(activate_dims)])
-#         self.model_y = np.empty([0, 1])
 #         self.ss_y = np.empty([0, 1])
 
 #         if initial_data is not None:
@@ -390,6 +393,16 @@
 
 #         self.config_origin = "subspace"
 
+#     @property
+#     def model_x(self) -> np.ndarray:
+#         """Normalized feature vectors of all the observations, used to train the model"""
+#         return self._model_x_buffer[: self._n_model_data]
+
+#     @property
+#     def model_y(self) -> np.ndarray:
+#         """Performances of all the observations, used to train the model"""
+#         return self._model_y_buffer[: self._n_model_data]
+
 #     @staticmethod
 #     def fit_forbidden_to_ss(
 #         cs_local: ConfigurationSpace, forbidden: AbstractForbiddenComponent
@@ -516,8 +529,19 @@
 
 #         X = self.normalize_input(X=X)
 
-#         self.model_x = np.vstack([self.model_x, X])
-#         self.model_y = np.vstack([self.model_y, y])
+#         n_model_data = self._n_model_data + len(X)
+#         if n_model_data > len(self._model_x_buffer):
+#             capacity = max(2 * len(self._model_x_buffer), n_model_data)
+#             model_x_buffer = np.empty([capacity, self._model_x_buffer.shape[1]])
+#             model_y_buffer = np.empty([capacity, 1])
+#             model_x_buffer[: self._n_model_data] = self.model_x
+#             model_y_buffer[: self._n_model_data] = self.model_y
+#             self._model_x_buffer = model_x_buffer
+#             self._model_y_buffer = model_y_buffer
+
+#         self._model_x_buffer[self._n_model_data : n_model_data] = X
+#         self._model_y_buffer[self._n_model_data : n_model_data] = y
+#         self._n_model_data = n_model_data
 
 #         self.ss_x = np.vstack([self.ss_x, X[ss_indices]])
 #         self.ss_y = np.vstack([self.ss_y, y[ss_indices]])
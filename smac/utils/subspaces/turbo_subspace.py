@@ -1,16 +1,13 @@
 # from __future__ import annotations
 
-# from typing import Dict, List, Optional, Tuple, Type, Union
+# from typing import Callable, Dict, List, Optional, Sequence, Tuple, Type, Union, overload
 
 # import math
-# import warnings
 
 # import numpy as np
 # from ConfigSpace.hyperparameters import NumericalHyperparameter
-# from ConfigSpace.util import deactivate_inactive_hyperparameters
 # from scipy.stats.qmc import LatinHypercube, Sobol
 
-# from smac.acquisition import AbstractAcquisitionMaximizer
 # from smac.acquisition.function import AbstractAcquisitionFunction, TS
 # from ConfigSpace import Configuration, ConfigurationSpace
 # from smac.model.abstract_model import AbstractModel
@@ -23,7 +20,44 @@
 
 # logger = get_logger(__name__)
 
-# warnings.filterwarnings("ignore", message="The balance properties of Sobol' points require" " n to be a power of 2.")
+
+# def _gpytorch_kernel_length(model: GPyTorchGaussianProcess) -> np.ndarray:
+#     """Kernel length of a GPyTorch Gaussian process"""
+#     return model.kernel.base_kernel.lengthscale.detach().cpu().numpy()
+
+
+# def _mcmc_kernel_length(model: MCMCGaussianProcess) -> np.ndarray:
+#     """Kernel length of a MCMC Gaussian process, averaged over the sampled hyperparameters"""
+#     return np.exp(np.mean((np.array(model.hypers)[:, 1:-1]), axis=0))
+
+
+# def _gp_kernel_length(model: AbstractGaussianProcess) -> np.ndarray:
+#     """Kernel length of a Gaussian process"""
+#     return np.exp(model.hypers[1:-1])
+
+
+# def _get_kernel_length_extractor(model: AbstractModel) -> Optional[Callable[[AbstractModel], np.ndarray]]:
+#     """
+#     Get the function that extracts the kernel length of a Gaussian process. The most specific model types are
+#     checked first as all of them are subclasses of AbstractGaussianProcess. The extractors are module-level
+#     functions such that the subspace can still be pickled.
+
+#     Parameters
+#     ----------
+#     model: AbstractModel
+#         model of the subspace
+#     Returns
+#     -------
+#     extractor: Optional[Callable[[AbstractModel], np.ndarray]]
+#         function that returns the kernel length of the model, None if the model is not a Gaussian process
+#     """
+#     if isinstance(model, (GPyTorchGaussianProcess, GloballyAugmentedLocalGaussianProcess)):
+#         return _gpytorch_kernel_length
+#     if isinstance(model, MCMCGaussianProcess):
+#         return _mcmc_kernel_length
+#     if isinstance(model, AbstractGaussianProcess):
+#         return _gp_kernel_length
+#     return None
 
 
 # class TuRBOSubSpace(LocalSubspace):
@@ -77,6 +111,8 @@
 #         n_candidate_max: int = 5000,
 #     ):
 #         self.num_valid_observations = 0
+#         # best observed performance, updated whenever new observations are added
+#         self.best_y = np.inf
 #         super(TuRBOSubSpace, self).__init__(
 #             config_space=config_space,
 #             bounds=bounds,
@@ -102,7 +138,12 @@
 #         n_hps = len(self.activate_dims)
 #         self.n_dims = n_hps
 #         self.n_init = n_init_x_params * self.n_dims
-#         self.n_candidates = min(100 * n_hps, n_candidate_max)
+#         n_candidates = min(100 * n_hps, n_candidate_max)
+#         # The balance properties of Sobol' points require the number of candidates to be a power of 2. We round it
+#         # down such that the candidate budget never grows
+#         self.n_candidates = 2 ** int(math.floor(math.log2(n_candidates)))
+#         # See Supplementary D, 'TuRBO details', a dimension is perturbed with probability min{1,20/d}
+#         self.prob_perturb = min(20.0 / self.n_dims, 1.0)
 
 #         self.failure_tol = max(failure_tol_min, n_hps)
 #         self.success_tol = success_tol
@@ -110,15 +151,19 @@
 #         self.length_init = length_init
 #         self.length_min = length_min
 #         self.length_max = length_max
+#         # The Latin hypercube engine is shared by all the restarts
+#         self._lhs = LatinHypercube(d=self.n_dims, seed=self.rng)
 #         self._restart_turbo(n_init_points=self.n_init)
 
 #         if initial_data is not None:
 #             self.add_new_observations(initial_data[0], initial_data[1])
-#             self.init_configs = []  # type: List[Configuration]
+#             self.init_vectors = np.empty([0, self.n_dims])
 
 #         self.lb = np.zeros(self.n_dims)
 #         self.ub = np.ones(self.n_dims)
 #         self.config_origin = "TuRBO"
+#         # the type of the model does not change, thus we only need to determine once how to get its kernel length
+#         self._get_kernel_length = _get_kernel_length_extractor(self.model)
 
 #     def _restart_turbo(
 #         self,
@@ -142,11 +187,26 @@
 
 #         self.num_valid_observations = 0
 
-#         init_vectors = LatinHypercube(d=self.n_dims, seed=np.random.seed(self.rng.randint(1, 2**20))).random(
-#             n=n_init_points
-#         )
+#         # The Sobol engine is kept until the next restart. As each draw has a size of a power of 2, consecutive draws
+#         # keep the balance properties of the sequence
+#         self._sobol = Sobol(d=self.n_dims, scramble=True, seed=self.rng.randint(low=0, high=10000000))
 
-#         self.init_configs = [Configuration(self.cs_local, vector=init_vector) for init_vector in init_vectors]
+#         # Only the vectors of the initial design are stored, their configurations are constructed once they are
+#         # suggested
+#         self.init_vectors = self._lhs.random(n=n_init_points)
+
+#     def _pop_init_config(self) -> Configuration:
+#         """
+#         Remove the last point from the initial design and construct its configuration
+
+#         Returns
+#         -------
+#         config: Configuration
+#             configuration of the removed initial design point in the local configuration space
+#         """
+#         init_vector = self.init_vectors[-1]
+#         self.init_vectors = self.init_vectors[:-1]
+#         return self._vector_to_config(init_vector)
 
 #     def adjust_length(self, new_observation: Union[float, np.ndarray]) -> None:
 #         """
@@ -161,7 +221,8 @@
 
 #         # We define a ``success'' as a candidate that improves upon $\xbest$, and a ``failure'' as a candidate that
 #         # does not.
-#         if optim_observation < np.min(self.model_y) - 1e-3 * math.fabs(np.min(self.model_y)):
+#         threshold = self.best_y - 1e-3 * abs(self.best_y)
+#         if optim_observation < threshold:
 #             logger.debug("New suggested value is better than the incumbent, success_count increases")
 #             self.success_count += 1
 #             self.failure_count = 0
@@ -185,7 +246,7 @@
 
 #     def _generate_challengers(  # type: ignore[override]
 #         self, _sorted: bool = True
-#     ) -> List[Tuple[float, Configuration]]:
+#     ) -> Sequence[Tuple[float, Configuration]]:
 #         """
 #         Generate new challengers list for this subspace
 
@@ -194,66 +255,96 @@
 #         _sorted: bool
 #             if the generated challengers are sorted by their acquisition function values
 #         """
-#         if len(self.init_configs) > 0:
-#             config_next = self.init_configs.pop()
-#             return [(0, config_next)]
+#         if len(self.init_vectors) > 0:
+#             return [(0, self._pop_init_config())]
 
 #         if self.length < self.length_min:
 #             self._restart_turbo(n_init_points=self.n_init)
-#             config_next = self.init_configs.pop()
-#             return [(0, config_next)]
+#             return [(0, self._pop_init_config())]
 
 #         self.model.train(self.model_x[-self.num_valid_observations :], self.model_y[-self.num_valid_observations :])
 #         self.update_model(predict_x_best=False, update_incumbent_array=True)
 
-#         sobol_gen = Sobol(d=self.n_dims, scramble=True, seed=self.rng.randint(low=0, high=10000000))
-#         sobol_seq = sobol_gen.random(self.n_candidates)
+#         sobol_seq = self._sobol.random(self.n_candidates)
 
 #         # adjust length according to kernel length
-#         if isinstance(
-#             self.model,
-#             (
-#                 AbstractGaussianProcess,
-#                 MCMCGaussianProcess,
-#                 GloballyAugmentedLocalGaussianProcess,
-#                 GPyTorchGaussianProcess,
-#             ),
-#         ):
-#             if isinstance(self.model, AbstractGaussianProcess):
-#                 kernel_length = np.exp(self.model.hypers[1:-1])
-#             elif isinstance(self.model, MCMCGaussianProcess):
-#                 kernel_length = np.exp(np.mean((np.array(self.model.hypers)[:, 1:-1]), axis=0))
-#             elif isinstance(self.model, (GPyTorchGaussianProcess, GloballyAugmentedLocalGaussianProcess)):
-#                 kernel_length = self.model.kernel.base_kernel.lengthscale.cpu().detach().numpy()
+#         if self._get_kernel_length is not None:
+#             kernel_length = self._get_kernel_length(self.model)
 
 #             # See section 'Trust regions' of section 2
 #             #  $\len_i = \lambda_i L / (\prod_{j=1}^d \lambda_j)^{1/d}$,
 #             # We now have weights.prod() = 1
-#             # This makes the result more stable
-#             subspace_scale = kernel_length / np.prod(np.power(kernel_length, 1.0 / self.n_dims))
+#             # This makes the result more stable. The geometric mean is computed in log space
+#             log_kernel_length = np.log(kernel_length)
+#             subspace_scale = np.exp(log_kernel_length - np.mean(log_kernel_length))
 
-#             subspace_length = self.length * subspace_scale
+#             half_length = 0.5 * self.length * subspace_scale
 
-#             subspace_lb = np.clip(self.incumbent_array - subspace_length * 0.5, 0.0, 1.0)
-#             subspace_ub = np.clip(self.incumbent_array + subspace_length * 0.5, 0.0, 1.0)
-#             sobol_seq = sobol_seq * (subspace_ub - subspace_lb) + subspace_lb
+#             # The bounds are clipped in place. Clipping the scaled points instead would move the points outside
+#             # of the unit hypercube onto its boundary rather than sampling the clipped trust region uniformly
+#             subspace_lb = self.incumbent_array - half_length
+#             subspace_ub = self.incumbent_array + half_length
+#             np.clip(subspace_lb, 0.0, 1.0, out=subspace_lb)
+#             np.clip(subspace_ub, 0.0, 1.0, out=subspace_ub)
+#             # the Sobol sequence is freshly drawn, thus we rescale it in place
+#             sobol_seq *= subspace_ub - subspace_lb
+#             sobol_seq += subspace_lb
 
-#         prob_perturb = min(20.0 / self.n_dims, 1.0)
-#         design = self._perturb_samples(prob_perturb, sobol_seq)
-
-#         # Only numerical hyperpameters are considered for TuRBO, we don't need to transfer the vectors to fit the
-#         # requirements of other sorts of hyperparameters
-#         configs = []
-#         for vector in design:
-#             conf = deactivate_inactive_hyperparameters(
-#                 configuration=None, configuration_space=self.cs_local, vector=vector
-#             )
-#             configs.append(conf)
+#         design = self._perturb_samples(self.prob_perturb, sobol_seq)
 
 #         if _sorted:
-#             return AbstractAcquisitionMaximizer._sort_configs_by_acq_value(self, configs)
+#             return self._sort_vectors_by_acq_value(design)
 #         else:
-#             return [(0, configs[i]) for i in range(len(configs))]
+#             return LazyChallengerList(
+#                 acq_values=np.zeros(len(design)),
+#                 design=design,
+#                 indices=np.arange(len(design)),
+#                 vector_to_config=self._vector_to_config,
+#             )
+
+#     def _sort_vectors_by_acq_value(self, design: np.ndarray) -> LazyChallengerList:
+#         """
+#         Sort the candidates by their acquisition function values. The acquisition function is evaluated on the
+#         design array directly and the configurations are only constructed once the challengers are accessed.
+
+#         Parameters
+#         ----------
+#         design: np.ndarray(N, D)
+#             candidate vectors in the local configuration space
+#         Returns
+#         -------
+#         challengers: LazyChallengerList
+#             candidates ordered by their acquisition function values (descending)
+#         """
+#         acq_values = self.acquisition_function._compute(design).flatten()
+#         acq_values[np.isnan(acq_values)] = -np.finfo(float).max
+
+#         # Last column is primary sort key!
+#         indices = np.lexsort((self.rng.rand(len(acq_values)), acq_values))[::-1]
+#         return LazyChallengerList(
+#             acq_values=acq_values,
+#             design=design,
+#             indices=indices,
+#             vector_to_config=self._vector_to_config,
+#         )
+
+#     def _vector_to_config(self, vector: np.ndarray) -> Configuration:
+#         """
+#         Construct the configuration of a candidate vector. Only numerical hyperpameters are considered for TuRBO, we
+#         don't need to transfer the vectors to fit the requirements of other sorts of hyperparameters. As conditions
+#         and forbiddens are rejected in __init__, deactivating inactive hyperparameters is a no-op and the
+#         configuration is constructed from the vector directly.
+
+#         Parameters
+#         ----------
+#         vector: np.ndarray(D)
+#             candidate vector in the local configuration space
+#         Returns
+#         -------
+#         config: Configuration
+#             configuration in the local configuration space
+#         """
+#         return Configuration(self.cs_local, vector=vector)
 
 #     def _perturb_samples(self, prob_perturb: float, design: np.ndarray) -> np.ndarray:
 #         """
@@ -274,21 +365,19 @@
 #         design_perturbed: np.ndarray(self.n_candidates, self.n_dims)
 #             perturbed design array
 #         """
-#         # we will use masked array, thus the indices that will be replaced will be marked with True
-#         mask = self.rng.rand(self.n_candidates, self.n_dims) > prob_perturb
+#         # the entries that are taken from the design are marked with True, all the others are replaced by the
+#         # incumbent value
+#         mask = self.rng.rand(self.n_candidates, self.n_dims) <= prob_perturb
 
-#         ind = np.where(np.sum(mask, axis=1) == self.n_dims)[0]
-#         if self.n_dims == 1:
-#             mask[ind, 0] = 0
-#         else:
-#             # ensure that no candidate will be completely replaced by the incumbent value
-#             mask[ind, self.rng.randint(0, self.n_dims, size=len(ind))] = 0
-#         return np.ma.array(design, mask=mask, fill_value=self.incumbent_array).filled()
+#         # ensure that no candidate will be completely replaced by the incumbent value
+#         ind = np.flatnonzero(~mask.any(axis=1))
+#         mask[ind, self.rng.randint(0, self.n_dims, size=len(ind))] = True
+#         return np.where(mask, design, self.incumbent_array)
 
 #     def add_new_observations(self, X: np.ndarray, y: np.ndarray) -> None:
 #         """
 #         Add new observations to the subspace, meanwhile, we add the number of valid observation to ensure that the
-#         subspace could be scaled properly.
+#         subspace could be scaled properly and update the best observed performance.
 
 #         Parameters
 #         ----------
@@ -303,3 +392,54 @@
 #         """
 #         super(TuRBOSubSpace, self).add_new_observations(X, y)
 #         self.num_valid_observations += len(y)
+#         if len(y) > 0:
+#             self.best_y = min(self.best_y, float(np.min(y)))
+
+
+# class LazyChallengerList(Sequence[Tuple[float, Configuration]]):
+#     """
+#     Challengers of a subspace whose configurations are only constructed from the candidate vectors once they are
+#     accessed. Usually only the first few challengers are evaluated.
+
+#     Parameters
+#     ----------
+#     acq_values: np.ndarray(N)
+#         acquisition function values of all the candidates
+#     design: np.ndarray(N, D)
+#         candidate vectors in the local configuration space
+#     indices: np.ndarray(M)
+#         indices of the candidates that are returned as challengers, in the order of the challengers
+#     vector_to_config: Callable[[np.ndarray], Configuration]
+#         function that constructs the configuration of a candidate vector
+#     """
+
+#     def __init__(
+#         self,
+#         acq_values: np.ndarray,
+#         design: np.ndarray,
+#         indices: np.ndarray,
+#         vector_to_config: Callable[[np.ndarray], Configuration],
+#     ):
+#         self.acq_values = acq_values
+#         self.design = design
+#         self.indices = indices
+#         self.vector_to_config = vector_to_config
+
+#     def __len__(self) -> int:
+#         return len(self.indices)
+
+#     @overload
+#     def __getitem__(self, index: int) -> Tuple[float, Configuration]:
+#         ...
+
+#     @overload
+#     def __getitem__(self, index: slice) -> List[Tuple[float, Configuration]]:
+#         ...
+
+#     def __getitem__(
+#         self, index: Union[int, slice]
+#     ) -> Union[Tuple[float, Configuration], List[Tuple[float, Configuration]]]:
+#         if isinstance(index, slice):
+#             return [self[i] for i in range(*index.indices(len(self)))]
+#         ind = self.indices[index]
+#         return self.acq_values[ind], self.vector_to_config(self.design[ind])
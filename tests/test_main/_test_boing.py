@@ -126,8 +126,7 @@ def test_do_switching(make_scenario):
     for i in range(1000):
         with patch.object(smac.utils.subspaces.turbo_subspace.TuRBOSubSpace, "generate_challengers", return_value=None):
             optimizer.ask()
-            while len(optimizer.turbo_optimizer.init_configs) > 0:
-                optimizer.turbo_optimizer.init_configs.pop()
+            optimizer.turbo_optimizer.init_vectors = optimizer.turbo_optimizer.init_vectors[:0]
         if not optimizer.run_TuRBO:
             break
     # TuRBO will be replaced with BOinG if it cannot find a better value continuously
@@ -138,7 +137,7 @@ def test_do_switching(make_scenario):
 
     config = scenario.configspace.sample_configuration()
     rh.add(config, 9.5, 10, StatusType.SUCCESS)
-    optimizer.turbo_optimizer.init_configs = []
+    optimizer.turbo_optimizer.init_vectors = optimizer.turbo_optimizer.init_vectors[:0]
     for i in range(10):
         next(optimizer.ask())
         if not optimizer.run_TuRBO:
@@ -59,7 +59,7 @@ def test_choose_next(make_scenario):
     assert x.shape == (2,)
 
     # remove the init configs
-    smbo.turbo.init_configs = []
+    smbo.turbo.init_vectors = smbo.turbo.init_vectors[:0]
     x = next(smbo.ask()).get_array()
 
     assert x.shape == (2,)